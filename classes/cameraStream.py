@@ -0,0 +1,48 @@
+import cv2
+import numpy as np
+import queue, threading
+from typing import Tuple
+
+
+class CameraStream():
+    """Drop in replacement for cv2.VideoCapture that grabs and decodes frames on a background thread
+    so the caller can process the previous frame meanwhile
+    """
+
+    QUEUE_SIZE = 1
+
+    def __init__(self, index: int = 0) -> None:
+        """Open the camera and start the capture thread
+
+        Input:
+        --------
+        index: optional, the index of the camera to open as given to cv2.VideoCapture
+        """
+        self.cap = cv2.VideoCapture(index)
+        self._frames = queue.Queue(maxsize=self.QUEUE_SIZE)
+        self._running = True
+        self._thread = threading.Thread(target=self.__capture, daemon=True)
+        self._thread.start()
+
+    def __capture(self) -> None:
+        """private method running on the capture thread, keeps only the newest frame in the queue by replacing an unread one"""
+        while self._running:
+            ret, frame = self.cap.read()
+            try:
+                self._frames.put_nowait((ret, frame))
+            except queue.Full:
+                try:
+                    self._frames.get_nowait()
+                except queue.Empty:
+                    pass
+                self._frames.put_nowait((ret, frame))
+
+    def read(self) -> Tuple[bool, np.ndarray]:
+        """Return the newest captured (ret, frame) pair, blocking until the capture thread has one that was not read yet"""
+        return self._frames.get()
+
+    def release(self) -> None:
+        """Stop the capture thread and release the camera"""
+        self._running = False
+        self._thread.join()
+        self.cap.release()
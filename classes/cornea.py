@@ -1,7 +1,63 @@
 import cv2
-import mediapipe as mp
 import numpy as np
-import os, time
+import os, time, atexit, queue, threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import cached_property
+
+
+_jitted = {}
+
+def jitted(function):
+    """Return the Numba compiled version of one of the kernels below, numba is only imported on first use
+    so scripts that only work with saved data never load it"""
+    if function not in _jitted:
+        from numba import njit
+        _jitted[function] = njit(cache=True, fastmath=True)(function)
+    return _jitted[function]
+
+
+def computeEyeMetrics(mesh, leftIdx, rightIdx, leftCenter, rightCenter, faceCenter, frameHeight, frameWidth, out):
+    """Numba kernel filling out with the iris to eye points distances of both eyes, the face center to the cropped frame corners distances
+    and the distance between the inner corners of the eyes, in the same order as the eyes metrics array"""
+    n = leftIdx.shape[0]
+    for i in range(n):
+        dx = mesh[leftIdx[i], 0] - mesh[leftCenter, 0]
+        dy = mesh[leftIdx[i], 1] - mesh[leftCenter, 1]
+        out[i] = np.sqrt(dx * dx + dy * dy)
+    for i in range(n):
+        dx = mesh[rightIdx[i], 0] - mesh[rightCenter, 0]
+        dy = mesh[rightIdx[i], 1] - mesh[rightCenter, 1]
+        out[n + i] = np.sqrt(dx * dx + dy * dy)
+
+    cx = mesh[faceCenter, 0]
+    cy = mesh[faceCenter, 1]
+    corners = ((0, 0), (0, frameWidth), (0, frameHeight), (frameWidth, frameHeight))
+    for i in range(4):
+        dx = cx - corners[i][0]
+        dy = cy - corners[i][1]
+        out[2 * n + i] = np.sqrt(dx * dx + dy * dy)
+
+    dx = mesh[rightIdx[0], 0] - mesh[leftIdx[0], 0]
+    dy = mesh[rightIdx[0], 1] - mesh[leftIdx[0], 1]
+    out[2 * n + 4] = np.sqrt(dx * dx + dy * dy)
+
+
+def boundingBox(mesh, idx):
+    """Numba kernel returning (minX, minY, maxX, maxY) of the mesh points at idx in a single pass"""
+    minX = maxX = mesh[idx[0], 0]
+    minY = maxY = mesh[idx[0], 1]
+    for i in range(1, idx.shape[0]):
+        x = mesh[idx[i], 0]
+        y = mesh[idx[i], 1]
+        if x < minX:
+            minX = x
+        elif x > maxX:
+            maxX = x
+        if y < minY:
+            minY = y
+        elif y > maxY:
+            maxY = y
+    return minX, minY, maxX, maxY
 
 
 class CorneaReader():
@@ -12,6 +68,10 @@ class CorneaReader():
     RIGHT_EYE = [133, 33, 7, 163, 144, 145, 153, 154, 155, 173, 157, 158, 159, 160, 161, 246]
     LEFT_IRIS_CENTER = 473
     RIGHT_IRIS_CENTER = 468
+    # frames are no longer flipped before detection, these are the landmarks of the opposite eye
+    # that end up on LEFT_EYE and RIGHT_EYE once the points are mirrored, in the same order
+    MIRRORED_LEFT_EYE = [133, 155, 154, 153, 145, 144, 163, 7, 33, 246, 161, 160, 159, 158, 157, 173]
+    MIRRORED_RIGHT_EYE = [362, 263, 249, 390, 373, 374, 380, 381, 382, 398, 384, 385, 386, 387, 388, 466]
     FACE_CENTER = 6
     
     FACE_METRICS_LEN = 37
@@ -19,15 +79,35 @@ class CorneaReader():
     EYESTRIP = [27, 28, 56, 190, 243, 112, 26, 22, 23, 24, 110, 25, 130, 247, 30, 29, 257, 259, 260, 467, 359, 255, 339, 254, 253, 252, 256, 341, 463, 414, 286, 258]
     TARGET_IMG_SIZE = [50, 120]
 
-    def __init__(self) -> None:
-        """Start the facemesh solution and be ready to read eye values & fetch eye images
+    FACE_LANDMARKER_MODEL = "models/face_landmarker.task"
+    PREPROCESS_WORKERS = 8
+    SAVE_QUEUE_SIZE = 32
+    DATASET_FILES = ["metrics.npy", "frames.npy", "mouse.npy"]
+    DATASET_CAPACITY = 10000
+
+    def __init__(self, useGPU: bool = True) -> None:
+        """Be ready to read eye values & fetch eye images, the facemesh solution is only started on the first readEyes call
+        so scripts that only work with saved data never import mediapipe
+
+        Input:
+        -------
+        useGPU: optional, try to run the face landmarker on the GPU delegate, falls back to CPU then to the legacy facemesh solution
         """
-        mp_face_mesh = mp.solutions.face_mesh
-        self.faceMesh = mp_face_mesh.FaceMesh(max_num_faces=1, refine_landmarks=True, min_detection_confidence=0.5, min_tracking_confidence=0.5)
-        self.data = None
+        self.useGPU = useGPU
+        self._lastTimestamp = -1
+        self._sampleCounters = {}
+        self._saveQueue = None
+        self._saveError = None
+        self._datasets = {}
+        # index arrays built once so the per frame fancy indexing doesn't convert the lists every call
+        self._leftEyeIdx = np.asarray(self.MIRRORED_LEFT_EYE, dtype=np.intp)
+        self._rightEyeIdx = np.asarray(self.MIRRORED_RIGHT_EYE, dtype=np.intp)
+        self._eyestripIdx = np.asarray(self.EYESTRIP, dtype=np.intp)
+        self._landmarksBuf = None
+        self._frameScale = None
+        self._rgbBuf = None
 
     def readEyes(self, frame: np.ndarray, saveDir: str = None) -> np.ndarray:
-        import pyautogui
         """Method to derive all eye points needed from a frame
 
         the method saves the eye distances as the first 33 elements of the data array, the xy labels for mouse as the 34th and 35th elements, while the rest is the image data
@@ -48,32 +128,108 @@ class CorneaReader():
         frame, (left, right, middle)
         """
         self.saveDir = saveDir
-        mousePos = pyautogui.position()
-        frame = cv2.flip(frame, 1)
-        frameRGB = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-        frame = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        if self._rgbBuf is None or self._rgbBuf.shape != frame.shape:
+            self._rgbBuf = np.empty_like(frame)
+        frameRGB = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB, dst=self._rgbBuf)
         imgHeigh, imgWidth = frame.shape[:2]
-        results = self.faceMesh.process(frameRGB)
+        # the landmarker tracks the face across calls itself and only reruns its detector when tracking is lost
+        landmarks = self.__detectLandmarks(frameRGB)
         self.CAMWIDTH, self.CAMHIGHT = frame.shape[0:2]
 
-        if results.multi_face_landmarks:
-            meshPoints = np.array([np.multiply([p.x, p.y], [imgWidth, imgHeigh]).astype(int) for p in results.multi_face_landmarks[0].landmark])
+        if landmarks is not None:
+            meshPointsF32 = self.__landmarksToPixels(landmarks, imgWidth, imgHeigh)
+            # integer pixels are only needed for cropping and drawing
+            meshPoints = meshPointsF32.astype(np.int32)
+            # mirror the points instead of the whole frame, the metrics are then taken on the opposite eye landmarks
+            meshPointsF32[:, 0] = imgWidth - meshPointsF32[:, 0]
 
             # frame = self.__visualize(frame, meshPoints, meshPoints[self.LEFT_IRIS_CENTER], meshPoints[self.RIGHT_IRIS_CENTER]) # NOT FOR PRODUCTION
             ret, frame = self.__cropEye(frame, meshPoints)
             if not ret:
                 print("unaccepted frame")
                 return None, frame
-            eyesMetrics = self.__calcEyeMetrics(meshPoints, frame)
+            eyesMetrics = self.__calcEyeMetrics(meshPointsF32, frame)
 
 
             if saveDir:
+                # only needed as a label while collecting data, so inference never imports pyautogui
+                import pyautogui
+                mousePos = pyautogui.position()
                 self.__saveDataArray(eyesMetrics, frame, mousePos, saveDir)
 
             return (eyesMetrics, frame), frame
         
         return (None, None), frame
 
+    @cached_property
+    def mediapipe(self):
+        """the mediapipe module, imported on first use since it is heavy to load"""
+        import mediapipe
+        return mediapipe
+
+    @cached_property
+    def faceMesh(self):
+        """the face landmarker, created on first use"""
+        return self.__createFaceLandmarker(self.useGPU)
+
+    def __createFaceLandmarker(self, useGPU: bool):
+        """private method to create the face landmarker task on the GPU delegate when possible, otherwise on the CPU,
+        and fall back to the legacy facemesh solution when the task api or its model file are not available"""
+        mp = self.mediapipe
+        self.useTasksApi = False
+        if os.path.exists(self.FACE_LANDMARKER_MODEL) and hasattr(mp, "tasks") and hasattr(mp.tasks.vision, "FaceLandmarker"):
+            vision = mp.tasks.vision
+            delegates = [mp.tasks.BaseOptions.Delegate.GPU, mp.tasks.BaseOptions.Delegate.CPU] if useGPU else [mp.tasks.BaseOptions.Delegate.CPU]
+            for delegate in delegates:
+                options = vision.FaceLandmarkerOptions(
+                    base_options=mp.tasks.BaseOptions(model_asset_path=self.FACE_LANDMARKER_MODEL, delegate=delegate),
+                    running_mode=vision.RunningMode.VIDEO,
+                    num_faces=1,
+                    min_face_detection_confidence=0.5,
+                    min_tracking_confidence=0.5
+                )
+                try:
+                    faceLandmarker = vision.FaceLandmarker.create_from_options(options)
+                except (RuntimeError, NotImplementedError) as e:
+                    print(f"could not start face landmarker on {delegate.name}: {e}")
+                    continue
+                self.useTasksApi = True
+                return faceLandmarker
+
+        mp_face_mesh = mp.solutions.face_mesh
+        return mp_face_mesh.FaceMesh(max_num_faces=1, refine_landmarks=True, min_detection_confidence=0.5, min_tracking_confidence=0.5)
+
+    def __detectLandmarks(self, frameRGB: np.ndarray):
+        """private method to run whichever face landmarker is active on an RGB frame and return the landmarks of the first face or None"""
+        faceMesh = self.faceMesh
+        if self.useTasksApi:
+            mp = self.mediapipe
+            # video running mode requires strictly increasing timestamps
+            timestamp = max(int(time.monotonic() * 1000), self._lastTimestamp + 1)
+            self._lastTimestamp = timestamp
+            results = faceMesh.detect_for_video(mp.Image(image_format=mp.ImageFormat.SRGB, data=frameRGB), timestamp)
+            return results.face_landmarks[0] if results.face_landmarks else None
+
+        results = faceMesh.process(frameRGB)
+        return results.multi_face_landmarks[0].landmark if results.multi_face_landmarks else None
+
+    def __landmarksToPixels(self, landmarks, imgWidth: int, imgHeigh: int) -> np.ndarray:
+        """private method to convert the normalized facemesh landmarks into float32 pixel coordinates with a single vectorized multiply,
+        the returned array is a buffer reused by the next call"""
+        n = len(landmarks)
+        if self._landmarksBuf is None or self._landmarksBuf.shape[0] != n:
+            self._landmarksBuf = np.empty((n, 2), dtype=np.float32)
+        if self._frameScale is None or self._frameScale[0] != imgWidth or self._frameScale[1] != imgHeigh:
+            self._frameScale = np.array([imgWidth, imgHeigh], dtype=np.float32)
+
+        buf = self._landmarksBuf
+        for i, p in enumerate(landmarks):
+            buf[i, 0] = p.x
+            buf[i, 1] = p.y
+
+        buf *= self._frameScale
+        return buf
+
     def __visualize(self, frame: np.ndarray, meshPoints: np.ndarray, leftCenter: np.ndarray, rightCenter: np.ndarray) -> np.ndarray:
         """private method to visualize gathered eye data on the current frame"""
 
@@ -85,13 +241,9 @@ class CorneaReader():
     def __calcEyeMetrics(self, meshPoints: np.ndarray, frame: np.ndarray) -> np.ndarray:
         """Method to take in the meshpoints and calculate all the features we need from eye metrics as normalized eye distances from cornea"""
 
-
-        leftIrisDistances = np.linalg.norm(meshPoints[self.LEFT_EYE] - meshPoints[self.LEFT_IRIS_CENTER], axis=1)
-        rightIrisDistances = np.linalg.norm(meshPoints[self.RIGHT_EYE] - meshPoints[self.RIGHT_IRIS_CENTER], axis=1)
-        middleEyeDistance = np.linalg.norm(meshPoints[self.RIGHT_EYE[0]] - meshPoints[self.LEFT_EYE[0]])
-        centerToEdgesDistances = np.linalg.norm(meshPoints[self.FACE_CENTER] - np.array([(0, 0), (0, frame.shape[1]), (0, frame.shape[0]), (frame.shape[1], frame.shape[0])]), axis=1)
-
-        eyesMetrics = np.concatenate((leftIrisDistances, rightIrisDistances, centerToEdgesDistances, [middleEyeDistance]))
+        # a fresh array each call since callers keep the metrics of several frames around
+        eyesMetrics = np.empty(self.FACE_METRICS_LEN)
+        jitted(computeEyeMetrics)(meshPoints, self._leftEyeIdx, self._rightEyeIdx, self.RIGHT_IRIS_CENTER, self.LEFT_IRIS_CENTER, self.FACE_CENTER, frame.shape[0], frame.shape[1], eyesMetrics)
 
 
         # for standard scaling later
@@ -106,31 +258,121 @@ class CorneaReader():
         return eyesMetrics
 
     def __cropEye(self, frame: np.ndarray, meshPoints: np.ndarray) -> np.ndarray:
-        """private method to take in the entire frame and crop the eyestrip with max enclosure"""
-        eyeStripCoordinates = meshPoints[self.EYESTRIP]
-        maxX, maxY = np.amax(eyeStripCoordinates, axis=0)
-        minX, minY = np.amin(eyeStripCoordinates, axis=0)
+        """private method to take in the entire unmirrored BGR frame and crop the eyestrip with max enclosure,
+        only the crop is mirrored and converted to gray"""
+        minX, minY, maxX, maxY = jitted(boundingBox)(meshPoints, self._eyestripIdx)
         frame = frame[minY:maxY, minX:maxX]
-        if (frame.shape[:2][0] > self.TARGET_IMG_SIZE[0]) or (frame.shape[:2][1] > self.TARGET_IMG_SIZE[1]) or (frame.shape[:2][0] > frame.shape[:2][1]):
+        if (frame.size == 0) or (frame.shape[:2][0] > self.TARGET_IMG_SIZE[0]) or (frame.shape[:2][1] > self.TARGET_IMG_SIZE[1]) or (frame.shape[:2][0] > frame.shape[:2][1]):
             return False, frame
         # print(frame.shape[:2])
-        return True, frame
+        return True, cv2.cvtColor(cv2.flip(frame, 1), cv2.COLOR_BGR2GRAY)
 
 
     def __saveDataArray(self, eyesMetrics: np.ndarray, croppedFrame: np.ndarray, mousePos: list[int], saveDir: str) -> None:
         """private method that would save data arrays to memory based on input to read eyes method and current data index"""
-        try:
-            prevDataFiles = os.listdir(f"data/{saveDir}")
-            i = len(prevDataFiles)
-        except FileNotFoundError:
-            i = 0
-            os.mkdir(f"data/{saveDir}")
+        self.__raiseSaveError()
+        i = self._sampleCounters.get(saveDir)
+        if i is None:
+            # only open the dataset once per session, then keep counting
+            i = self.__openDataset(saveDir)
+        self._sampleCounters[saveDir] = i + 1
 
         self.savedSampleCount = i
-        np.savez(f"data/{saveDir}/{i}", eyesMetrics=eyesMetrics, croppedFrame=croppedFrame, mousePos=mousePos)
+        if self._saveQueue is None:
+            self.__startSaveWorker()
+        # writing happens on the save worker so padding and disk I/O overlap with the next frames
+        self._saveQueue.put((saveDir, i, eyesMetrics, croppedFrame, mousePos))
+
+    def __openDataset(self, saveDir: str) -> int:
+        """private method to open the memory mapped dataset of saveDir, creating it when missing, and return how many samples it holds"""
+        filesPath = f"data/{saveDir}/"
+        if os.path.exists(filesPath + "metrics.npy"):
+            dataset = [np.load(filesPath + name, mmap_mode='r+') for name in self.DATASET_FILES]
+        else:
+            os.makedirs(filesPath, exist_ok=True)
+            dataset = self.__createDataset(filesPath, self.DATASET_CAPACITY)
+        self._datasets[saveDir] = dataset
+        return self.__countSamples(dataset[2])
+
+    def __createDataset(self, filesPath: str, capacity: int, suffix: str = "") -> list:
+        """private method to create the (metrics, frames, mouse) memory mapped files with room for capacity samples,
+        empty rows are marked by a NaN mouse position"""
+        shapes = [(capacity, self.FACE_METRICS_LEN), (capacity, *self.TARGET_IMG_SIZE), (capacity, 2)]
+        dtypes = [np.float32, np.uint8, np.float32]
+        dataset = [np.lib.format.open_memmap(filesPath + name + suffix, mode='w+', dtype=dtype, shape=shape)
+                   for name, dtype, shape in zip(self.DATASET_FILES, dtypes, shapes)]
+        dataset[2][:] = np.nan
+        return dataset
+
+    def __growDataset(self, saveDir: str) -> None:
+        """private method to double the capacity of a full dataset by copying it into bigger files"""
+        filesPath = f"data/{saveDir}/"
+        oldDataset = self._datasets[saveDir]
+        capacity = oldDataset[0].shape[0]
+        newDataset = self.__createDataset(filesPath, capacity * 2, ".tmp")
+        for old, new in zip(oldDataset, newDataset):
+            new[:capacity] = old
+            new.flush()
+        # memory maps have to be released before the files can be replaced
+        del old, new, oldDataset, newDataset
+        self._datasets.pop(saveDir)
+        for name in self.DATASET_FILES:
+            os.replace(filesPath + name + ".tmp", filesPath + name)
+        self._datasets[saveDir] = [np.load(filesPath + name, mmap_mode='r+') for name in self.DATASET_FILES]
+
+    @staticmethod
+    def __countSamples(mousePos: np.ndarray) -> int:
+        """private method to find the row after the last saved sample, rows of failed saves before it stay empty (NaN mouse position)
+        so new samples are appended after them instead of overwriting the saved ones"""
+        saved = np.flatnonzero(~np.isnan(mousePos[:, 0]))
+        return int(saved[-1]) + 1 if len(saved) else 0
+
+    def __startSaveWorker(self) -> None:
+        """private method to start the daemon thread that drains the save queue, pending saves are flushed at exit"""
+        self._saveQueue = queue.Queue(maxsize=self.SAVE_QUEUE_SIZE)
+        threading.Thread(target=self.__saveWorker, daemon=True).start()
+        atexit.register(self.waitForSaves)
+
+    def __saveWorker(self) -> None:
+        """private method running on the save thread, writes queued samples into the dataset one by one"""
+        while True:
+            saveDir, i, eyesMetrics, croppedFrame, mousePos = self._saveQueue.get()
+            try:
+                if i >= self._datasets[saveDir][0].shape[0]:
+                    self.__growDataset(saveDir)
+                # index the dataset directly instead of keeping the memory maps in locals,
+                # __growDataset can only replace the files once nothing references the old maps
+                self._datasets[saveDir][0][i] = eyesMetrics
+                self._datasets[saveDir][1][i] = self.__paddingRestOfImage(croppedFrame)
+                # the mouse position is written last since it marks the row as saved
+                self._datasets[saveDir][2][i] = mousePos
+            except Exception as e:
+                # keep the worker alive, otherwise readEyes and waitForSaves block forever on the queue,
+                # the error is raised on the caller thread by the next save or waitForSaves
+                print(f"could not save sample {i} of {saveDir}: {e}")
+                if self._saveError is None:
+                    self._saveError = e
+            finally:
+                self._saveQueue.task_done()
+
+    def waitForSaves(self) -> None:
+        """block until every sample queued by readEyes has been written to disk"""
+        if self._saveQueue is not None:
+            self._saveQueue.join()
+        for dataset in self._datasets.values():
+            for array in dataset:
+                array.flush()
+        self.__raiseSaveError()
+
+    def __raiseSaveError(self) -> None:
+        """private method to raise the first error of the save worker on the caller thread, so data collection doesn't go on without saving"""
+        if self._saveError is not None:
+            error, self._saveError = self._saveError, None
+            raise RuntimeError("saving a sample failed, later samples may not have been saved") from error
 
     def preProcess(self, dataDir: str = None) -> None:
-        """PreProcessing function that would process the frame of each sample from all data saved in dataDir
+        """PreProcessing function that would convert data saved in dataDir as separate .npz samples, by older versions of readEyes,
+        and append it to the memory mapped dataset loadData reads, converted files are renamed with a .converted suffix
         
         INPUT
         ---------
@@ -139,25 +381,56 @@ class CorneaReader():
         """
         if dataDir:
             filesPath = f"data/{dataDir}/"
-            samplesFilesNames = os.listdir(filesPath)
-            eyesMetrics = np.empty((len(samplesFilesNames), self.FACE_METRICS_LEN))
-            frames = []
-            mousePos = np.empty((len(samplesFilesNames), 2))
-
-            for i, file in enumerate(samplesFilesNames):
-                file = np.load(filesPath+file)
-                eyesMetrics[i] = file['eyesMetrics']
-                resizedFrame = self.__paddingRestOfImage(file['croppedFrame'])
-                frames.append(resizedFrame)
-                mousePos[i] = file['mousePos']
-            frames = np.array(frames)
-            np.savez(f"data/{dataDir}/allDataArray", eyesMetrics=eyesMetrics, croppedFrame=frames, mousePos=mousePos)
+            samplesFilesNames = [name for name in os.listdir(filesPath) if name.endswith(".npz") and name != "allDataArray.npz"]
+            if not samplesFilesNames:
+                # nothing left to convert, the directory only holds the dataset
+                return
+
+            # loading is mostly zip parsing and disk reads, so overlap the files on a thread pool
+            with ThreadPoolExecutor(max_workers=self.PREPROCESS_WORKERS) as executor:
+                samples = list(executor.map(self.__loadSample, (filesPath+name for name in samplesFilesNames)))
+
+            # frames stay uint8 and the rest float32, the model casts and normalizes on its side
+            eyesMetrics = np.stack([sample[0] for sample in samples]).astype(np.float32, copy=False)
+            frames = np.stack([sample[1] for sample in samples]).astype(np.uint8, copy=False)
+            mousePos = np.stack([sample[2] for sample in samples]).astype(np.float32, copy=False)
+
+            # append after the samples already saved by readEyes instead of overwriting them
+            count = self._sampleCounters.get(dataDir)
+            if count is None or dataDir not in self._datasets:
+                count = self.__openDataset(dataDir)
+            while self._datasets[dataDir][0].shape[0] < count + len(samples):
+                self.__growDataset(dataDir)
+            for array, values in zip(self._datasets[dataDir], (eyesMetrics, frames, mousePos)):
+                array[count:count + len(samples)] = values
+                array.flush()
+            self._sampleCounters[dataDir] = count + len(samples)
+
+            # mark the converted files so running preProcess again doesn't append them twice
+            for name in samplesFilesNames:
+                os.replace(filesPath + name, filesPath + name + ".converted")
 
         
+    def __loadSample(self, filePath: str) -> tuple:
+        """private method to load a single saved sample and pad its frame, returns (eyesMetrics, frame, mousePos)"""
+        with np.load(filePath) as file:
+            return file['eyesMetrics'], self.__paddingRestOfImage(file['croppedFrame']), file['mousePos']
+
     def loadData(self, dataDir: str) -> np.ndarray:
+        """Load the (eyesMetrics, frames, mousePos) arrays saved in dataDir as read only memory maps, pages are only read from disk when used"""
         filesPath = f"data/{dataDir}/"
-        file = np.load(filesPath+'allDataArray.npz')
-        return (file["eyesMetrics"], file['croppedFrame'], file["mousePos"])
+        if not os.path.exists(filesPath + "metrics.npy"):
+            # directories preprocessed before the memory mapped dataset
+            file = np.load(filesPath+'allDataArray.npz')
+            return (file["eyesMetrics"], file['croppedFrame'], file["mousePos"])
+
+        eyesMetrics, frames, mousePos = [np.load(filesPath + name, mmap_mode='r') for name in self.DATASET_FILES]
+        count = self.__countSamples(mousePos)
+        saved = ~np.isnan(mousePos[:count, 0])
+        if saved.all():
+            return (eyesMetrics[:count], frames[:count], mousePos[:count])
+        # skip the empty rows left by failed saves, this copies the samples into memory
+        return (eyesMetrics[:count][saved], frames[:count][saved], mousePos[:count][saved])
 
         
     def preProcessOnTheFly(self, frame: np.ndarray) -> np.ndarray:
@@ -177,52 +450,20 @@ class CorneaReader():
 
     def __del__(self) -> None:
         """dunder delete method to clean up class after finishing"""
-        self.faceMesh.close()
+        self.waitForSaves()
+        if "faceMesh" in self.__dict__:
+            self.faceMesh.close()
 
 
-    def __resizeAspectRatio(self, image: np.ndarray) -> np.ndarray:
-        """method to take input as a cropped frame with any dimension and then resize and zero fill it to the correct ration"""
-        widthPerc = 0
-        heightPerc = 0
-        
-
-        heightPerc = self.TARGET_IMG_SIZE[0] - image.shape[0]
-        widthPerc = self.TARGET_IMG_SIZE[1] - image.shape[1]
-
-        heightPerc = heightPerc * 100 / self.TARGET_IMG_SIZE[0]
-        widthPerc = widthPerc * 100 / self.TARGET_IMG_SIZE[1]
-
-        if heightPerc < widthPerc:
-            scale_percent = heightPerc
-
-        else:
-            scale_percent = widthPerc        
-
-        width = image.shape[1] + int(self.TARGET_IMG_SIZE[1] * scale_percent / 100)
-        height = image.shape[0] + int(self.TARGET_IMG_SIZE[0] * scale_percent / 100)
-        dim = (width, height)
-        image = cv2.resize(image, dim, interpolation = cv2.INTER_AREA)
-
-        image = self.__paddingRestOfImage(image)   
-        
-        return image
-    
     def __paddingRestOfImage(self, image: np.ndarray) -> np.ndarray:
-        # Get the current size of the image
-        current_size = image.shape[:2]
-
-        # Compute the amount of padding needed
-        padding_width = self.TARGET_IMG_SIZE[1] - current_size[1]
-        padding_height = self.TARGET_IMG_SIZE[0] - current_size[0]
-        
-        image = cv2.copyMakeBorder(image,
-                                top=0,
-                                bottom=padding_height,
-                                left=0,
-                                right=padding_width,
-                                borderType=cv2.BORDER_CONSTANT,
-                                value=(0, 0, 0))
-        return image
+        """method to zero fill a cropped frame up to TARGET_IMG_SIZE, keeping it unscaled at the top left corner"""
+        targetHeight, targetWidth = self.TARGET_IMG_SIZE
+        if image.shape[:2] == (targetHeight, targetWidth):
+            # already stored at the target size by the save worker
+            return image
+        padded = np.zeros((targetHeight, targetWidth) + image.shape[2:], dtype=image.dtype)
+        padded[:image.shape[0], :image.shape[1]] = image
+        return padded
 
     def showFrameThenExit(self, frame: np.ndarray, sec: int) -> None:
         """A debugging method used to show a frame for a number of seconds and exit do not use unless debugging only"""
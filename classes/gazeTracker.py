@@ -1,5 +1,6 @@
 from .cornea import CorneaReader
 import cv2
+import tensorflow as tf
 from tensorflow.keras.models import load_model as tf_load_model
 import numpy as np
 from typing import Tuple
@@ -14,7 +15,17 @@ class GazeTracker():
         modelDir: the directory and name of the model to be used in predictions
         """
         self.corneaReader = CorneaReader()
-        self.model = tf_load_model(modelDir)
+        if modelDir.endswith(".tflite"):
+            # int8 model exported by multiTrain.py, run on the default XNNPACK delegate
+            self.model = None
+            self.interpreter = tf.lite.Interpreter(model_path=modelDir)
+            self.interpreter.allocate_tensors()
+            inputs = self.interpreter.get_input_details()
+            self.framesInput = next(i for i in inputs if "frames" in i["name"])
+            self.metricsInput = next(i for i in inputs if "eyesMetrics" in i["name"])
+            self.output = self.interpreter.get_output_details()[0]
+        else:
+            self.model = tf_load_model(modelDir)
 
 
     def track_gaze(self, frames: list[np.ndarray]) -> np.ndarray:
@@ -40,7 +51,29 @@ class GazeTracker():
 
         inputMetrics = np.array(inputMetrics)
         inputFrames = np.array(inputFrames)
-        predictions = self.model.predict([inputFrames, inputMetrics])
+        if self.model is None:
+            predictions = self.__predictQuantized(inputFrames, inputMetrics)
+        else:
+            predictions = self.model.predict([inputFrames, inputMetrics])
         coordinates = np.average(predictions, axis=0)
 
-        return coordinates
\ No newline at end of file
+        return coordinates
+
+    def __predictQuantized(self, inputFrames: np.ndarray, inputMetrics: np.ndarray) -> np.ndarray:
+        """private method to run the int8 tflite model on each frame, quantizing the inputs, the predictions come out as float32"""
+        predictions = []
+        for inputFrame, inputMetric in zip(inputFrames, inputMetrics):
+            inputFrame = inputFrame.reshape(self.framesInput["shape"])
+            inputMetric = inputMetric.reshape(self.metricsInput["shape"])
+            self.interpreter.set_tensor(self.framesInput["index"], self.__quantize(inputFrame, self.framesInput))
+            self.interpreter.set_tensor(self.metricsInput["index"], self.__quantize(inputMetric, self.metricsInput))
+            self.interpreter.invoke()
+            predictions.append(self.interpreter.get_tensor(self.output["index"])[0])
+
+        return np.array(predictions)
+
+    @staticmethod
+    def __quantize(values: np.ndarray, details: dict) -> np.ndarray:
+        """private method to quantize float values to the int8 input described by details"""
+        scale, zeroPoint = details["quantization"]
+        return np.clip(np.round(values / scale + zeroPoint), -128, 127).astype(details["dtype"])
@@ -1,8 +1,9 @@
 import cv2
 from classes.cornea import CorneaReader
+from classes.cameraStream import CameraStream
 import numpy as np
 
-cap = cv2.VideoCapture(0)
+cap = CameraStream(0)
 cornea = CorneaReader()
 
 
@@ -6,12 +6,32 @@ import numpy as np
 cr = CorneaReader()
 eyesMetrics, frames, y = cr.loadData('datesetTest')
 
+VALIDATION_SPLIT = 0.2
+BATCH_SIZE = 32
+
+# frames are kept as uint8 in memory and only cast to float32 per batch
+def toModelInputs(eyesMetrics, frames, y):
+    return {"eyesMetrics": tf.cast(eyesMetrics, tf.float32), "frames": tf.cast(frames, tf.float32)}, {"mousePosition": tf.cast(y, tf.float32)}
+
+# same split as keras validation_split, the last samples are held out before shuffling
+# explicit split points since [:-0] would be empty, too few samples for a validation set train without one like keras does
+trainCount = len(y) - int(len(y) * VALIDATION_SPLIT)
+trainDs = tf.data.Dataset.from_tensor_slices((eyesMetrics[:trainCount], frames[:trainCount], y[:trainCount]))
+trainDs = trainDs.cache().shuffle(trainCount).batch(BATCH_SIZE).map(toModelInputs, num_parallel_calls=tf.data.AUTOTUNE).prefetch(tf.data.AUTOTUNE)
+valDs = None
+if trainCount < len(y):
+    # cached before the cast like the training set so the frames stay uint8 in memory
+    valDs = tf.data.Dataset.from_tensor_slices((eyesMetrics[trainCount:], frames[trainCount:], y[trainCount:]))
+    valDs = valDs.cache().batch(BATCH_SIZE).map(toModelInputs, num_parallel_calls=tf.data.AUTOTUNE).prefetch(tf.data.AUTOTUNE)
+
 convInput = tf.keras.layers.Input(shape=(cr.TARGET_IMG_SIZE[0],cr.TARGET_IMG_SIZE[1], 1), name="frames")
 denseInput = tf.keras.layers.Input(shape=(cr.FACE_METRICS_LEN), name='eyesMetrics')
 
 CNN_KERNEL_SIZE = (3, 5)
 
-x1 = tf.keras.layers.Conv2D(40, CNN_KERNEL_SIZE, activation='swish', input_shape=convInput.shape)(convInput)
+# normalizing inside the model keeps the saved model usable on raw uint8 frames from the gaze tracker
+x1 = tf.keras.layers.Rescaling(1.0 / 255)(convInput)
+x1 = tf.keras.layers.Conv2D(40, CNN_KERNEL_SIZE, activation='swish', input_shape=convInput.shape)(x1)
 x1 = tf.keras.layers.MaxPool2D()(x1)
 x1 = tf.keras.layers.Conv2D(30, CNN_KERNEL_SIZE, activation='swish', input_shape=x1.shape)(x1)
 x1 = tf.keras.layers.MaxPool2D()(x1)
@@ -28,7 +48,8 @@ model = tf.keras.Model(inputs=[convInput, denseInput], outputs=output, name='mul
 model.compile(
     loss=tf.keras.losses.MeanSquaredError(),
     optimizer=tf.keras.optimizers.Adam(),
-    metrics=['accuracy']
+    metrics=['accuracy'],
+    jit_compile=True
 )
 
 model.summary()
@@ -41,14 +62,31 @@ tensorboard = tf.keras.callbacks.TensorBoard(
 
 
 model.fit(
-    {"eyesMetrics": eyesMetrics, "frames": frames},
-    {"mousePosition": y},
+    trainDs,
     epochs=60,
     verbose=2,
-    batch_size=32,
-    validation_split=0.2,
-    callbacks=[tensorboard],
-    shuffle=True
+    validation_data=valDs,
+    callbacks=[tensorboard]
 )
 
-model.save("models/convModelTest8.h5")
\ No newline at end of file
+model.save("models/convModelTest8.h5")
+
+# int8 copy of the model for live inference, weights and activations are calibrated on a slice of the training data
+REPRESENTATIVE_SAMPLES = 100
+
+def representativeDataset():
+    for i in range(min(REPRESENTATIVE_SAMPLES, len(y))):
+        yield {
+            "frames": np.asarray(frames[i:i+1], dtype=np.float32).reshape(1, cr.TARGET_IMG_SIZE[0], cr.TARGET_IMG_SIZE[1], 1),
+            "eyesMetrics": np.asarray(eyesMetrics[i:i+1], dtype=np.float32)
+        }
+
+converter = tf.lite.TFLiteConverter.from_keras_model(model)
+converter.optimizations = [tf.lite.Optimize.DEFAULT]
+converter.representative_dataset = representativeDataset
+converter.target_spec.supported_ops = [tf.lite.OpsSet.TFLITE_BUILTINS_INT8]
+converter.inference_input_type = tf.int8
+# the output stays float32, 256 levels are too coarse for screen pixel coordinates
+converter.inference_output_type = tf.float32
+with open("models/convModelTest8.tflite", "wb") as f:
+    f.write(converter.convert())
\ No newline at end of file